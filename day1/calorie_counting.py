@@ -1,7 +1,12 @@
 import argparse
-from dataclasses import dataclass
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import Iterable, List, Tuple, Union
+
+CHUNK_SIZE = 64 * 1024 * 1024
 
 
 @dataclass
@@ -33,7 +38,25 @@ class Expedition:
         return total_calories_for_top_n
 
 
-def process_input(path: Path):
+@dataclass
+class TopCaloriesTracker:
+    n: int
+    heap: List[int] = field(default_factory=list)
+
+    def add_total(self, total_calories: int):
+        if len(self.heap) < self.n:
+            heapq.heappush(self.heap, total_calories)
+        elif self.heap and total_calories > self.heap[0]:
+            heapq.heapreplace(self.heap, total_calories)
+
+    def get_top_n_by_calories(self) -> List[int]:
+        return sorted(self.heap, reverse=True)
+
+    def get_total_calories_for_top_n(self) -> int:
+        return sum(self.heap)
+
+
+def process_input(path: Path, top_number: int = 3):
     expedition = Expedition([])
     current_elf_items = []
     with open(path, "r") as fin:
@@ -45,8 +68,74 @@ def process_input(path: Path):
                 elf = Elf(current_elf_items)
                 expedition.add_elf(elf)
                 current_elf_items = []
-    top_3_calories_total = expedition.get_total_calories_for_top_n(3)
-    return top_3_calories_total
+    if current_elf_items:
+        expedition.add_elf(Elf(current_elf_items))
+    top_n_calories_total = expedition.get_total_calories_for_top_n(top_number)
+    return top_n_calories_total
+
+
+def add_elf_totals(lines: Iterable[Union[str, bytes]], tracker: TopCaloriesTracker):
+    current_elf_total = 0
+    has_items = False
+    for line in lines:
+        line = line.strip()
+        if line:
+            current_elf_total += int(line)
+            has_items = True
+        else:
+            tracker.add_total(current_elf_total)
+            current_elf_total = 0
+            has_items = False
+    if has_items:
+        tracker.add_total(current_elf_total)
+
+
+def process_input_streaming(path: Path, top_number: int = 3) -> int:
+    tracker = TopCaloriesTracker(top_number)
+    with open(path, "r") as fin:
+        add_elf_totals(fin, tracker)
+    return tracker.get_total_calories_for_top_n()
+
+
+def find_chunk_boundaries(path: Path, num_chunks: int) -> List[Tuple[int, int]]:
+    file_size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, "rb") as fin:
+        for i in range(1, num_chunks):
+            offset = max(file_size * i // num_chunks, boundaries[-1])
+            fin.seek(offset)
+            fin.readline()
+            for line in iter(fin.readline, b""):
+                if not line.strip():
+                    break
+            boundaries.append(fin.tell())
+    boundaries.append(file_size)
+    return [
+        (start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end
+    ]
+
+
+def get_top_n_for_chunk(path: Path, start: int, end: int, top_number: int) -> List[int]:
+    tracker = TopCaloriesTracker(top_number)
+    with open(path, "rb") as fin:
+        fin.seek(start)
+        add_elf_totals(fin.read(end - start).splitlines(), tracker)
+    return tracker.heap
+
+
+def process_input_parallel(path: Path, top_number: int = 3, workers: int = 1) -> int:
+    num_chunks = max(workers, os.path.getsize(path) // CHUNK_SIZE)
+    chunks = find_chunk_boundaries(path, num_chunks)
+    tracker = TopCaloriesTracker(top_number)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(get_top_n_for_chunk, path, start, end, top_number)
+            for start, end in chunks
+        ]
+        for future in futures:
+            for total_calories in future.result():
+                tracker.add_total(total_calories)
+    return tracker.get_total_calories_for_top_n()
 
 
 if __name__ == "__main__":
@@ -65,8 +154,24 @@ if __name__ == "__main__":
         default=3,
         help="Number of elves to be used from the top.",
     )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Keep only the top totals in memory while reading the input.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to parse the input in chunks.",
+    )
     args = parser.parse_args()
-    max_calories = process_input(args.input)
+    if args.workers > 1:
+        max_calories = process_input_parallel(args.input, args.top_number, args.workers)
+    elif args.streaming:
+        max_calories = process_input_streaming(args.input, args.top_number)
+    else:
+        max_calories = process_input(args.input, args.top_number)
     print(
         f"Total number of calories carrying by top {args.top_number} elves: {max_calories}"
     )
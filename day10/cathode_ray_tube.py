@@ -1,7 +1,11 @@
 import argparse
+import random
+import time
+import tracemalloc
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List, Tuple, Union
 
 
 @dataclass
@@ -50,6 +54,148 @@ def run_instructions(path: Path) -> Program:
     return program
 
 
+@dataclass
+class CpuEvent:
+    kind: str
+    cycle: int
+    value: Union[int, str]
+
+
+def iter_register_spans(lines: Iterable[str]) -> Iterator[Tuple[int, int, int]]:
+    x = 1
+    cycle = 1
+    for line in lines:
+        if line.startswith("noop"):
+            yield cycle, cycle, x
+            cycle += 1
+        elif line.strip():
+            yield cycle, cycle + 1, x
+            cycle += 2
+            x += int(line.strip().split()[1])
+    yield cycle, cycle, x
+
+
+def iter_cpu_events(
+    lines: Iterable[str],
+    sample_cycles: Iterable[int] = (),
+    line_length: int = 40,
+    draw_rows: bool = True,
+) -> Iterator[CpuEvent]:
+    pending_cycles = sorted(set(sample_cycles))
+    next_sample = 0
+    row = []
+    for first_cycle, last_cycle, x in iter_register_spans(lines):
+        while (
+            next_sample < len(pending_cycles)
+            and pending_cycles[next_sample] <= last_cycle
+        ):
+            cycle = pending_cycles[next_sample]
+            if cycle >= first_cycle:
+                yield CpuEvent("signal", cycle, cycle * x)
+            next_sample += 1
+        if not draw_rows:
+            if next_sample == len(pending_cycles):
+                return
+            continue
+        for cycle in range(first_cycle, last_cycle + 1):
+            row.append("#" if abs(x - (cycle - 1) % line_length) < 2 else ".")
+            if len(row) == line_length:
+                yield CpuEvent("crt_row", cycle, "".join(row))
+                row = []
+    if row:
+        yield CpuEvent("crt_row", last_cycle, "".join(row))
+
+
+def get_signal_strength_sum(path: Path, sample_cycles: Iterable[int]) -> int:
+    with open(path, "r") as fin:
+        events = iter_cpu_events(fin, sample_cycles, draw_rows=False)
+        return sum(event.value for event in events)
+
+
+@dataclass
+class RegisterTimeline:
+    start_cycles: List[int] = field(default_factory=list)
+    values: List[int] = field(default_factory=list)
+    num_cycles: int = 0
+    line_length: int = 40
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], line_length: int = 40):
+        timeline = cls(line_length=line_length)
+        for first_cycle, last_cycle, x in iter_register_spans(lines):
+            if not timeline.values or timeline.values[-1] != x:
+                timeline.start_cycles.append(first_cycle)
+                timeline.values.append(x)
+            timeline.num_cycles = last_cycle
+        return timeline
+
+    def get_x(self, cycle: int) -> int:
+        return self.values[bisect_right(self.start_cycles, cycle) - 1]
+
+    def get_signal_strengths(self, cycles: Iterable[int]) -> List[int]:
+        return [cycle * self.get_x(cycle) for cycle in cycles]
+
+    def iter_crt_rows(self) -> Iterator[str]:
+        for row_start in range(1, self.num_cycles + 1, self.line_length):
+            row_end = min(row_start + self.line_length, self.num_cycles + 1)
+            row = ["."] * (row_end - row_start)
+            change_id = bisect_right(self.start_cycles, row_start) - 1
+            while (
+                change_id < len(self.start_cycles)
+                and self.start_cycles[change_id] < row_end
+            ):
+                x = self.values[change_id]
+                first_col = max(self.start_cycles[change_id], row_start) - row_start
+                last_col = row_end - row_start - 1
+                if change_id + 1 < len(self.start_cycles):
+                    next_start = self.start_cycles[change_id + 1]
+                    last_col = min(last_col, next_start - row_start - 1)
+                for col in range(max(first_col, x - 1), min(last_col, x + 1) + 1):
+                    row[col] = "#"
+                change_id += 1
+            yield "".join(row)
+
+
+def run_benchmark(num_instructions: int) -> None:
+    lines = [
+        "noop" if random.random() < 0.99 else f"addx {random.randint(-5, 5)}"
+        for _ in range(num_instructions)
+    ]
+    sample_cycles = range(20, num_instructions, 40)
+    results = []
+    for name, run in (
+        ("cycles list", lambda: run_cycles_list(lines, sample_cycles)),
+        ("timeline", lambda: run_timeline(lines, sample_cycles)),
+    ):
+        started = time.perf_counter()
+        results.append(run())
+        elapsed = time.perf_counter() - started
+        tracemalloc.start()
+        run()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name}: {elapsed:.4f}s, peak memory {peak_memory / 1024:.1f} KiB")
+    assert results[0] == results[1]
+
+
+def run_cycles_list(lines: List[str], sample_cycles: Iterable[int]) -> Tuple[int, str]:
+    program = Program()
+    for line in lines:
+        if line.startswith("noop"):
+            program.run_noop()
+        else:
+            program.run_addx(int(line.split()[1]))
+    program.finish()
+    signal_sum = sum(program.get_signal_strenght(i) for i in sample_cycles)
+    return signal_sum, program.draw_pixels()
+
+
+def run_timeline(lines: List[str], sample_cycles: Iterable[int]) -> Tuple[int, str]:
+    timeline = RegisterTimeline.from_lines(lines)
+    signal_sum = sum(timeline.get_signal_strengths(sample_cycles))
+    return signal_sum, "".join(timeline.iter_crt_rows())
+
+
 def process_input(program: Program) -> int:
     signal_ids = range(20, 221, 40)
     signal_strengths = [program.get_signal_strenght(i) for i in signal_ids]
@@ -64,12 +210,47 @@ if __name__ == "__main__":
         default="day10/input/input.txt",
         help="Path to the input file.",
     )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Print CRT rows while running, without storing every cycle.",
+    )
+    parser.add_argument(
+        "--timeline",
+        action="store_true",
+        help="Store only the cycles at which X changes.",
+    )
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        default=0,
+        help="Compare the cycles list and the timeline on this many instructions.",
+    )
     args = parser.parse_args()
-    program = run_instructions(args.input)
-    sum_of_signal_strengths = process_input(program)
-    print(f"Sum of signal strengths {sum_of_signal_strengths}")
-
-    pixels = program.draw_pixels()
-    for start in range(0, program.msg_length + 1, program.line_length):
-        end = min(start + program.line_length, program.msg_length)
-        print(pixels[start:end])
+    if args.benchmark:
+        run_benchmark(args.benchmark)
+    elif args.timeline:
+        with open(args.input, "r") as fin:
+            timeline = RegisterTimeline.from_lines(fin)
+        sum_of_signal_strengths = sum(timeline.get_signal_strengths(range(20, 221, 40)))
+        print(f"Sum of signal strengths {sum_of_signal_strengths}")
+        for row in timeline.iter_crt_rows():
+            print(row)
+    elif args.streaming:
+        sum_of_signal_strengths = 0
+        with open(args.input, "r") as fin:
+            for event in iter_cpu_events(fin, range(20, 221, 40)):
+                if event.kind == "signal":
+                    sum_of_signal_strengths += event.value
+                else:
+                    print(event.value)
+        print(f"Sum of signal strengths {sum_of_signal_strengths}")
+    else:
+        program = run_instructions(args.input)
+        sum_of_signal_strengths = process_input(program)
+        print(f"Sum of signal strengths {sum_of_signal_strengths}")
+
+        pixels = program.draw_pixels()
+        for start in range(0, program.msg_length + 1, program.line_length):
+            end = min(start + program.line_length, program.msg_length)
+            print(pixels[start:end])
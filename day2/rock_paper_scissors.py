@@ -1,6 +1,9 @@
 import argparse
 from enum import IntEnum
 from pathlib import Path
+from typing import Dict, List, Union
+
+CHUNK_SIZE = 64 * 1024 * 1024
 
 
 class Outcome(IntEnum):
@@ -58,6 +61,74 @@ def get_your_figure_from_outcome(opponent_figure: Figure, outcome: Outcome) -> F
     return your_figure
 
 
+OPPONENT_CYPHERS = "ABC"
+YOUR_CYPHERS = "XYZ"
+ROUND_CODES = [
+    f"{opponent} {you}".encode()
+    for opponent in OPPONENT_CYPHERS
+    for you in YOUR_CYPHERS
+]
+
+
+def build_score_table(strategy: Dict[str, Union[Figure, Outcome]]) -> List[int]:
+    score_table = []
+    for opponent in OPPONENT_CYPHERS:
+        for you in YOUR_CYPHERS:
+            opponent_figure = cypher2figure.get(opponent)
+            decoded = strategy.get(you)
+            if isinstance(decoded, Outcome):
+                outcome = decoded
+                your_figure = get_your_figure_from_outcome(opponent_figure, outcome)
+            else:
+                your_figure = decoded
+                outcome = get_outcome(opponent_figure, your_figure)
+            score_table.append(outcome + your_figure)
+    return score_table
+
+
+SCORE_TABLE_PT1 = build_score_table(cypher2figure)
+SCORE_TABLE_PT2 = build_score_table(cypher2outcome)
+
+default_strategies = {"figure": cypher2figure, "outcome": cypher2outcome}
+
+
+def count_round_codes(path: Path) -> List[int]:
+    counts = [0] * len(ROUND_CODES)
+    tail = b""
+    with open(path, "rb") as fin:
+        for chunk in iter(lambda: fin.read(CHUNK_SIZE), b""):
+            chunk = tail + chunk
+            last_newline = chunk.rfind(b"\n") + 1
+            chunk, tail = chunk[:last_newline], chunk[last_newline:]
+            for code, round_code in enumerate(ROUND_CODES):
+                counts[code] += chunk.count(round_code)
+    for code, round_code in enumerate(ROUND_CODES):
+        counts[code] += tail.count(round_code)
+    return counts
+
+
+def get_total_score(counts: List[int], score_table: List[int]) -> int:
+    return sum(count * score for count, score in zip(counts, score_table))
+
+
+def process_input_pt1_bulk(path: Path) -> int:
+    return get_total_score(count_round_codes(path), SCORE_TABLE_PT1)
+
+
+def process_input_pt2_bulk(path: Path) -> int:
+    return get_total_score(count_round_codes(path), SCORE_TABLE_PT2)
+
+
+def evaluate_strategies(
+    path: Path, strategies: Dict[str, Dict[str, Union[Figure, Outcome]]]
+) -> Dict[str, int]:
+    counts = count_round_codes(path)
+    return {
+        name: get_total_score(counts, build_score_table(strategy))
+        for name, strategy in strategies.items()
+    }
+
+
 def process_input_pt1(path: Path) -> int:
     total_score = 0
     with open(path, "r") as fin:
@@ -92,6 +163,16 @@ if __name__ == "__main__":
         default="day2/input/input.txt",
         help="Path to the input file.",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Score the file with the precomputed round score table.",
+    )
     args = parser.parse_args()
-    total_score = process_input_pt2(args.input)
-    print(f"Total score: {total_score}")
+    if args.bulk:
+        total_scores = evaluate_strategies(args.input, default_strategies)
+        for name, total_score in total_scores.items():
+            print(f"Total score ({name} strategy): {total_score}")
+    else:
+        total_score = process_input_pt2(args.input)
+        print(f"Total score: {total_score}")
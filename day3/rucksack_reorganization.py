@@ -1,7 +1,10 @@
 import argparse
+import gzip
 import string
+import sys
+from collections import deque
 from pathlib import Path
-from typing import Iterable, Set, Tuple
+from typing import Iterable, Iterator, List, Set, Tuple
 
 
 def get_priority(char: str) -> int:
@@ -10,6 +13,40 @@ def get_priority(char: str) -> int:
     return priority
 
 
+def build_priority_bits() -> List[int]:
+    priority_bits = [0] * 256
+    for char in string.ascii_lowercase + string.ascii_uppercase:
+        priority_bits[ord(char)] = 1 << get_priority(char)
+    return priority_bits
+
+
+PRIORITY_BITS = build_priority_bits()
+ALL_PRIORITY_BITS = sum(PRIORITY_BITS)
+
+
+def get_bitmask(rucksack: str) -> int:
+    bitmask = 0
+    for byte in rucksack.encode():
+        bitmask |= PRIORITY_BITS[byte]
+    return bitmask
+
+
+def get_bitmask_priority(bitmask: int) -> int:
+    total_priority = 0
+    while bitmask:
+        lowest_bit = bitmask & -bitmask
+        total_priority += lowest_bit.bit_length() - 1
+        bitmask ^= lowest_bit
+    return total_priority
+
+
+def find_duplicates_bitmask(rucksacks: Iterable[str]) -> int:
+    duplicates_bitmask = ALL_PRIORITY_BITS
+    for rucksack in rucksacks:
+        duplicates_bitmask &= get_bitmask(rucksack)
+    return duplicates_bitmask
+
+
 def split_input(s: str) -> Tuple[str, str]:
     id_half = len(s) // 2
     return s[:id_half], s[id_half:]
@@ -19,29 +56,62 @@ def find_duplicates(rucksacks: Iterable[str]) -> Set[str]:
     return set.intersection(*[set(rucksack) for rucksack in rucksacks])
 
 
-def process_input(path: Path) -> int:
+def get_priority_of_duplicates(
+    rucksacks: Iterable[str], use_bitmask: bool = False
+) -> int:
+    if use_bitmask:
+        return get_bitmask_priority(find_duplicates_bitmask(rucksacks))
+    duplicates = find_duplicates(rucksacks)
+    return sum(get_priority(duplicate) for duplicate in duplicates)
+
+
+def read_rucksacks(path: Path) -> Iterator[str]:
+    if str(path) == "-":
+        for line in sys.stdin:
+            yield line.strip()
+        return
+    open_fn = gzip.open if path.suffix == ".gz" else open
+    with open_fn(path, "rt") as fin:
+        for line in fin:
+            yield line.strip()
+
+
+def iter_groups(
+    rucksacks: Iterable[str],
+    group_size: int = 3,
+    sliding: bool = False,
+    keep_incomplete: bool = False,
+) -> Iterator[Tuple[str, ...]]:
+    group = deque(maxlen=group_size if sliding else None)
+    for rucksack in rucksacks:
+        group.append(rucksack)
+        if len(group) == group_size:
+            yield tuple(group)
+            if not sliding:
+                group.clear()
+    if keep_incomplete and group and (not sliding or len(group) < group_size):
+        yield tuple(group)
+
+
+def process_input(path: Path, use_bitmask: bool = False) -> int:
     total_priority = 0
-    with open(path, "r") as fin:
-        for line in fin.readlines():
-            rucksacks = split_input(line.strip())
-            duplicates = find_duplicates(rucksacks)
-            for duplicate in duplicates:
-                total_priority += get_priority(duplicate)
+    for rucksack in read_rucksacks(path):
+        rucksacks = split_input(rucksack)
+        total_priority += get_priority_of_duplicates(rucksacks, use_bitmask)
     return total_priority
 
 
-def process_input_pt_2(path: Path, group_size: int = 3) -> int:
+def process_input_pt_2(
+    path: Path,
+    group_size: int = 3,
+    use_bitmask: bool = False,
+    sliding: bool = False,
+    keep_incomplete: bool = False,
+) -> int:
     total_priority = 0
-    group = []
-    with open(path, "r") as fin:
-        for line in fin.readlines():
-            line = line.strip()
-            group.append(line)
-            if len(group) == group_size:
-                duplicates = find_duplicates(group)
-                for duplicate in duplicates:
-                    total_priority += get_priority(duplicate)
-                group = []
+    groups = iter_groups(read_rucksacks(path), group_size, sliding, keep_incomplete)
+    for group in groups:
+        total_priority += get_priority_of_duplicates(group, use_bitmask)
     return total_priority
 
 
@@ -51,8 +121,36 @@ if __name__ == "__main__":
         "--input",
         type=Path,
         default="day3/input/input.txt",
-        help="Path to the input file.",
+        help="Path to the input file, .gz files and - for stdin are supported.",
+    )
+    parser.add_argument(
+        "--group_size",
+        "--group-size",
+        type=int,
+        default=3,
+        help="Number of rucksacks in a group.",
+    )
+    parser.add_argument(
+        "--sliding",
+        action="store_true",
+        help="Use overlapping windows of rucksacks instead of disjoint groups.",
+    )
+    parser.add_argument(
+        "--keep_incomplete",
+        action="store_true",
+        help="Also score a trailing group with fewer than group_size rucksacks.",
+    )
+    parser.add_argument(
+        "--bitmask",
+        action="store_true",
+        help="Intersect rucksacks as bitmasks of item priorities.",
     )
     args = parser.parse_args()
-    total_priority = process_input_pt_2(args.input)
+    total_priority = process_input_pt_2(
+        args.input,
+        group_size=args.group_size,
+        use_bitmask=args.bitmask,
+        sliding=args.sliding,
+        keep_incomplete=args.keep_incomplete,
+    )
     print(f"Total priority: {total_priority}")
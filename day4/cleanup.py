@@ -1,7 +1,13 @@
 import argparse
-from dataclasses import dataclass
+import random
+import re
+import timeit
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Tuple
+from typing import Iterable, List, Tuple
+
+NUMBER_PATTERN = re.compile(rb"\d+")
 
 
 @dataclass
@@ -35,6 +41,126 @@ def is_overlap(left: Range, right: Range) -> bool:
     )
 
 
+def is_any_overlap(left: Range, right: Range) -> bool:
+    return (
+        is_overlap(left, right)
+        or is_left_within_right(left, right)
+        or is_left_within_right(right, left)
+    )
+
+
+@dataclass
+class RangeIndex:
+    ranges: List[Range] = field(default_factory=list)
+    lower_bounds: List[int] = field(default_factory=list)
+    sorted_upper_bounds: List[int] = field(default_factory=list)
+    max_upper_bounds: List[int] = field(default_factory=list)
+
+    @classmethod
+    def bulk_load(cls, ranges: Iterable[Range]) -> "RangeIndex":
+        index = cls(sorted(ranges, key=lambda r: (r.lower_bound, r.upper_bound)))
+        index.lower_bounds = [r.lower_bound for r in index.ranges]
+        index.sorted_upper_bounds = sorted(r.upper_bound for r in index.ranges)
+        index.max_upper_bounds = [0] * len(index.ranges)
+        index._build_max_upper_bounds(0, len(index.ranges))
+        return index
+
+    def _build_max_upper_bounds(self, start: int, end: int) -> int:
+        if start >= end:
+            return -1
+        mid = (start + end) // 2
+        max_upper_bound = max(
+            self.ranges[mid].upper_bound,
+            self._build_max_upper_bounds(start, mid),
+            self._build_max_upper_bounds(mid + 1, end),
+        )
+        self.max_upper_bounds[mid] = max_upper_bound
+        return max_upper_bound
+
+    def find_overlapping(self, query: Range) -> List[Range]:
+        result = []
+        segments = [(0, len(self.ranges))]
+        while segments:
+            start, end = segments.pop()
+            if start >= end:
+                continue
+            mid = (start + end) // 2
+            if self.max_upper_bounds[mid] < query.lower_bound:
+                continue
+            segments.append((start, mid))
+            if self.ranges[mid].lower_bound <= query.upper_bound:
+                if self.ranges[mid].upper_bound >= query.lower_bound:
+                    result.append(self.ranges[mid])
+                segments.append((mid + 1, end))
+        return result
+
+    def stab(self, section: int) -> List[Range]:
+        return self.find_overlapping(Range(section, section))
+
+    def count_overlapping(self, query: Range) -> int:
+        ending_before = bisect_left(self.sorted_upper_bounds, query.lower_bound)
+        starting_after = len(self.ranges) - bisect_right(
+            self.lower_bounds, query.upper_bound
+        )
+        return len(self.ranges) - ending_before - starting_after
+
+
+def load_ranges(path: Path) -> List[Range]:
+    ranges = []
+    with open(path, "r") as fin:
+        for line in fin:
+            ranges.extend(parse_input_line(line))
+    return ranges
+
+
+def run_benchmark(path: Path, num_queries: int = 1000) -> None:
+    ranges = load_ranges(path)
+    index = RangeIndex.bulk_load(ranges)
+    lowest = min(r.lower_bound for r in ranges)
+    highest = max(r.upper_bound for r in ranges)
+    queries = []
+    for _ in range(num_queries):
+        lo, hi = sorted(random.randint(lowest, highest) for _ in range(2))
+        queries.append(Range(lo, hi))
+
+    brute_force_counts = [sum(is_any_overlap(r, q) for r in ranges) for q in queries]
+    index_counts = [index.count_overlapping(q) for q in queries]
+    found_counts = [len(index.find_overlapping(q)) for q in queries]
+    assert brute_force_counts == index_counts == found_counts
+
+    timings = {
+        "brute force": lambda: [
+            sum(is_any_overlap(r, q) for r in ranges) for q in queries
+        ],
+        "index count_overlapping": lambda: [
+            index.count_overlapping(q) for q in queries
+        ],
+        "index find_overlapping": lambda: [index.find_overlapping(q) for q in queries],
+    }
+    print(f"{len(ranges)} ranges, {num_queries} overlap queries")
+    for name, run in timings.items():
+        print(f"{name}: {min(timeit.repeat(run, number=1, repeat=3)):.4f}s")
+
+
+def parse_input_columns(
+    path: Path,
+) -> Tuple[List[int], List[int], List[int], List[int]]:
+    with open(path, "rb") as fin:
+        numbers = [int(n) for n in NUMBER_PATTERN.findall(fin.read())]
+    return numbers[0::4], numbers[1::4], numbers[2::4], numbers[3::4]
+
+
+def process_input_columnar(path: Path) -> Tuple[int, int]:
+    num_fully_contained_pairs = 0
+    num_overlaping_pairs = 0
+    for l1, h1, l2, h2 in zip(*parse_input_columns(path)):
+        if l1 <= h2 and l2 <= h1:
+            num_overlaping_pairs += 1
+            if (l1 <= l2 and h2 <= h1) or (l2 <= l1 and h1 <= h2):
+                num_fully_contained_pairs += 1
+    return num_fully_contained_pairs, num_overlaping_pairs
+
+
 def process_input(path: Path) -> int:
     num_fully_contained_pairs = 0
     with open(path, "r") as fin:
@@ -53,12 +179,7 @@ def process_input_pt_2(path: Path) -> int:
     with open(path, "r") as fin:
         for line in fin.readlines():
             left, right = parse_input_line(line)
-            is_overlaping = (
-                is_overlap(left, right)
-                or is_left_within_right(left, right)
-                or is_left_within_right(right, left)
-            )
-            if is_overlaping:
+            if is_any_overlap(left, right):
                 num_overlaping_pairs += 1
     return num_overlaping_pairs
 
@@ -71,6 +192,26 @@ if __name__ == "__main__":
         default="day4/input/input.txt",
         help="Path to the input file.",
     )
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        default=0,
+        help="Number of random queries to compare the range index with brute force.",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Evaluate both parts from one read of the input.",
+    )
     args = parser.parse_args()
-    num_fully_contained_pairs = process_input_pt_2(args.input)
-    print(f"Num overlaping pairs {num_fully_contained_pairs}.")
+    if args.benchmark:
+        run_benchmark(args.input, args.benchmark)
+    if args.columnar:
+        num_fully_contained_pairs, num_overlaping_pairs = process_input_columnar(
+            args.input
+        )
+        print(f"Num fully contained pairs {num_fully_contained_pairs}.")
+        print(f"Num overlaping pairs {num_overlaping_pairs}.")
+    else:
+        num_overlaping_pairs = process_input_pt_2(args.input)
+        print(f"Num overlaping pairs {num_overlaping_pairs}.")
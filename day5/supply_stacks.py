@@ -1,8 +1,9 @@
 import argparse
 import re
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
 OPERATION_PARSER = re.compile(r"^move (\S+) from (\S+) to (\S+)$")
 
@@ -10,17 +11,14 @@ OPERATION_PARSER = re.compile(r"^move (\S+) from (\S+) to (\S+)$")
 @dataclass
 class Stack:
     id: str
-    crates: str
+    crates: List[str] = field(default_factory=list)
 
-    def add_crates_before(self, s: str):
-        self.crates = s + self.crates
+    def add_crates_after(self, s: Sequence[str], retain_order):
+        self.crates.extend(s if retain_order else reversed(s))
 
-    def add_crates_after(self, s: str, retain_order):
-        self.crates += s if retain_order else s[::-1]
-
-    def remove_n_crates(self, n: int):
+    def remove_n_crates(self, n: int) -> List[str]:
         removed_crates = self.crates[-n:]
-        self.crates = self.crates[:-n]
+        del self.crates[-n:]
         return removed_crates
 
 
@@ -37,26 +35,37 @@ class Task:
     stacks: Dict[str, Stack]
     operations: List[Operation]
 
+    def apply_operation(self, operation: Operation, retain_order=False):
+        removed_crates = self.stacks.get(operation.move_from).remove_n_crates(
+            operation.num_crates
+        )
+        self.stacks.get(operation.move_to).add_crates_after(
+            removed_crates, retain_order
+        )
+
     def complete_all_operations(self, retain_order=False):
         for operation in self.operations:
-            removed_crates = self.stacks.get(operation.move_from).remove_n_crates(
-                operation.num_crates
-            )
-            self.stacks.get(operation.move_to).add_crates_after(
-                removed_crates, retain_order
-            )
+            self.apply_operation(operation, retain_order)
 
     def get_codes_of_top_crates(self):
         codes = "".join([self.stacks[stack_id].crates[-1] for stack_id in self.ids])
         return codes
 
 
+def build_stacks(crate_rows: List[str], stack_ids: List[str]) -> Dict[str, Stack]:
+    stack_map = {stack_id: Stack(stack_id) for stack_id in stack_ids}
+    for crate_row in reversed(crate_rows):
+        for i, crate in enumerate(crate_row[1::4]):
+            if not crate.isspace():
+                stack_map[stack_ids[i]].crates.append(crate)
+    return stack_map
+
+
 def parse_input(path: Path) -> Task:
     with open(path, "r") as fin:
         operations = []
         crate_rows = []
         stack_ids = []
-        stack_map = {}
         for line in fin.readlines():
             if "move" in line:
                 res = OPERATION_PARSER.match(line)
@@ -68,17 +77,54 @@ def parse_input(path: Path) -> Task:
                 crate_rows.append(line)
             elif not line.isspace():
                 stack_ids = line.split()
-                stack_map = {stack_id: Stack(stack_id, "") for stack_id in stack_ids}
-        for crate_row in crate_rows:
-            row_len = len(crate_row)
-            for i, start in enumerate(range(0, row_len, 4)):
-                crate = crate_row[start : min(row_len, start + 4)][1]
-                if not crate.isspace():
-                    stack_id = stack_ids[i]
-                    stack_map[stack_id].add_crates_before(crate)
+        stack_map = build_stacks(crate_rows, stack_ids)
     return Task(ids=stack_ids, stacks=stack_map, operations=operations)
 
 
+def parse_stacks_header(lines: Iterator[str]) -> Task:
+    crate_rows = []
+    stack_ids = []
+    for line in lines:
+        if "[" in line:
+            crate_rows.append(line)
+        elif not line.isspace():
+            stack_ids = line.split()
+            break
+    return Task(
+        ids=stack_ids, stacks=build_stacks(crate_rows, stack_ids), operations=[]
+    )
+
+
+def iter_operations(lines: Iterable[str]) -> Iterator[Operation]:
+    for line in lines:
+        if line.startswith("move"):
+            _, num_crates, _, move_from, _, move_to = line.split()
+            yield Operation(int(num_crates), move_from, move_to)
+
+
+def run_operations_streaming(lines: Iterator[str]) -> Tuple[str, str]:
+    task = parse_stacks_header(lines)
+    task_retain_order = Task(
+        ids=task.ids,
+        stacks={
+            stack_id: Stack(stack_id, list(stack.crates))
+            for stack_id, stack in task.stacks.items()
+        },
+        operations=[],
+    )
+    for operation in iter_operations(lines):
+        task.apply_operation(operation)
+        task_retain_order.apply_operation(operation, retain_order=True)
+    return task.get_codes_of_top_crates(), task_retain_order.get_codes_of_top_crates()
+
+
+def process_input_streaming(path: Path) -> Tuple[str, str]:
+    if str(path) == "-":
+        return run_operations_streaming(iter(sys.stdin))
+    with open(path, "r") as fin:
+        return run_operations_streaming(iter(fin))
+
+
 def process_input(path: Path) -> str:
     task = parse_input(path=path)
     task.complete_all_operations()
@@ -99,8 +145,18 @@ if __name__ == "__main__":
         "--input",
         type=Path,
         default="day5/input/input.txt",
-        help="Path to the input file.",
+        help="Path to the input file, - reads stdin in streaming mode.",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Apply moves while reading them, for both crane models at once.",
     )
     args = parser.parse_args()
-    message = process_input_pt_2(args.input)
-    print(f"Message for the elves {message}.")
+    if args.streaming:
+        message_9000, message_9001 = process_input_streaming(args.input)
+        print(f"Message for the elves (CrateMover 9000) {message_9000}.")
+        print(f"Message for the elves (CrateMover 9001) {message_9001}.")
+    else:
+        message = process_input_pt_2(args.input)
+        print(f"Message for the elves {message}.")
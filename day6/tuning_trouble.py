@@ -1,7 +1,16 @@
 import argparse
+import glob
+import json
+import random
+import string
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, Sequence, Tuple, Union
 
 DEFAULT_MARKER_SIZE = 4
+CHUNK_SIZE = 1024 * 1024
 
 
 def process_input(path: Path, marker_size: int) -> int:
@@ -17,6 +26,121 @@ def process_input(path: Path, marker_size: int) -> int:
     return num_chars_before_marker
 
 
+def read_chunks(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    if str(path) == "-":
+        yield from iter(lambda: sys.stdin.buffer.read(chunk_size), b"")
+        return
+    with open(path, "rb") as fin:
+        yield from iter(lambda: fin.read(chunk_size), b"")
+
+
+def find_markers(
+    chunks: Iterable[bytes], marker_sizes: Iterable[int]
+) -> Dict[int, int]:
+    pending_sizes = sorted(set(marker_sizes))
+    markers = {marker_size: -1 for marker_size in pending_sizes}
+    last_seen = [-1] * 256
+    window_start = 0
+    offset = 0
+    for chunk in chunks:
+        line_ends = [i for i in (chunk.find(b"\n"), chunk.find(b"\r")) if i != -1]
+        if line_ends:
+            chunk = chunk[: min(line_ends)]
+        for i, char in enumerate(chunk, offset):
+            if last_seen[char] >= window_start:
+                window_start = last_seen[char] + 1
+            last_seen[char] = i
+            while pending_sizes and i - window_start + 1 >= pending_sizes[0]:
+                markers[pending_sizes.pop(0)] = i + 1
+            if not pending_sizes:
+                return markers
+        if line_ends:
+            break
+        offset += len(chunk)
+    return markers
+
+
+def find_marker(chunks: Iterable[bytes], marker_size: int) -> int:
+    return find_markers(chunks, [marker_size])[marker_size]
+
+
+def process_input_streaming(path: Path, marker_size: int) -> int:
+    return find_marker(read_chunks(path), marker_size)
+
+
+def find_marker_brute_force(stream: str, marker_size: int) -> int:
+    for i in range(len(stream) - marker_size + 1):
+        if len(set(stream[i : i + marker_size])) == marker_size:
+            return i + marker_size
+    return -1
+
+
+def run_self_check(num_streams: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "stream.txt"
+        for _ in range(num_streams):
+            chars = string.ascii_lowercase[: random.randint(1, 8)]
+            stream = "".join(random.choices(chars, k=random.randint(0, 30)))
+            path.write_text(f"{stream}\n")
+            for marker_size in range(1, 6):
+                expected = find_marker_brute_force(stream, marker_size)
+                chunk_size = random.randint(1, 8)
+                streamed = find_marker(read_chunks(path, chunk_size), marker_size)
+                assert process_input(path, marker_size) == expected, stream
+                assert streamed == expected, (stream, marker_size)
+    print(f"Checked {num_streams} streams ending with a newline.")
+
+
+def expand_streams(patterns: Iterable[str]) -> Iterator[Tuple[str, bool]]:
+    """Yields (stream, True) for each distinct stream and (pattern, False) for
+    every glob pattern that matches nothing."""
+    seen = set()
+    for pattern in patterns:
+        if pattern == "-" or not glob.has_magic(pattern):
+            matches = [pattern]
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                yield pattern, False
+        for stream in matches:
+            key = stream if stream == "-" else Path(stream).resolve()
+            if key not in seen:
+                seen.add(key)
+                yield stream, True
+
+
+def scan_stream(
+    stream: str, marker_sizes: Sequence[int]
+) -> Dict[str, Union[str, Dict[int, int]]]:
+    try:
+        markers = find_markers(read_chunks(Path(stream)), marker_sizes)
+    except OSError as error:
+        return {"stream": stream, "error": str(error)}
+    return {"stream": stream, "markers": markers}
+
+
+def scan_streams(
+    patterns: Iterable[str],
+    marker_sizes: Sequence[int],
+    workers: int = 4,
+) -> Iterator[Dict[str, Union[str, Dict[int, int]]]]:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = [
+            (
+                {"stream": stream, "error": "no files match pattern"}
+                if not matched
+                else (
+                    scan_stream(stream, marker_sizes)
+                    if stream == "-"
+                    else executor.submit(scan_stream, stream, marker_sizes)
+                )
+            )
+            for stream, matched in expand_streams(patterns)
+        ]
+        for result in results:
+            yield result if isinstance(result, dict) else result.result()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run Tuning Trouble.")
     parser.add_argument(
@@ -31,6 +155,49 @@ if __name__ == "__main__":
         default=DEFAULT_MARKER_SIZE,
         help="Size of the marker.",
     )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Scan the input in chunks with a last seen index per char.",
+    )
+    parser.add_argument(
+        "--streams",
+        nargs="+",
+        help="Files, glob patterns or - for stdin to scan, results go out as JSONL.",
+    )
+    parser.add_argument(
+        "--marker_sizes",
+        type=int,
+        nargs="+",
+        default=[DEFAULT_MARKER_SIZE],
+        help="Sizes of the markers to find in each of --streams.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of processes scanning streams concurrently.",
+    )
+    parser.add_argument(
+        "--self_check",
+        type=int,
+        default=0,
+        help="Compare the detectors with a brute force on this many random streams.",
+    )
     args = parser.parse_args()
-    num_chars = process_input(args.input, marker_size=args.marker_size)
-    print(f"Number of chars before the marker: {num_chars}.")
+    if args.self_check:
+        run_self_check(args.self_check)
+    elif args.streams:
+        failed = False
+        for result in scan_streams(args.streams, args.marker_sizes, args.workers):
+            print(json.dumps(result))
+            failed = failed or "error" in result
+        sys.exit(1 if failed else 0)
+    else:
+        if args.streaming:
+            num_chars = process_input_streaming(
+                args.input, marker_size=args.marker_size
+            )
+        else:
+            num_chars = process_input(args.input, marker_size=args.marker_size)
+        print(f"Number of chars before the marker: {num_chars}.")
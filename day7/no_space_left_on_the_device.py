@@ -1,8 +1,10 @@
 import argparse
 import re
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
+from itertools import accumulate
 from pathlib import Path
-from typing import List, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 FILE_PATTERN = re.compile(r"^(\d+) (\S+)$")
 FOLDER_PATTERN = re.compile(r"^dir (\S+)$")
@@ -13,7 +15,7 @@ TOTAL_SPACE = 70000000
 REQUIRED_SPACE = 30000000
 
 
-@dataclass
+@dataclass(slots=True)
 class File:
     name: str
     size: int
@@ -22,38 +24,56 @@ class File:
         return self.size
 
 
-@dataclass
+@dataclass(slots=True)
 class BaseFolder:
     name: str
     size: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Folder(BaseFolder):
     files: List[File] = field(default_factory=list)
     folders: List[BaseFolder] = field(default_factory=list)
     parent: Union[None, BaseFolder] = None
+    files_size: int = field(default=0, repr=False, compare=False)
+    folders_by_name: Dict[str, BaseFolder] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+    is_size_valid: bool = field(default=False, repr=False, compare=False)
 
     def get_size(self) -> int:
-        own_files_size = sum(f.get_size() for f in self.files)
-        own_folders_size = sum(f.get_size() for f in self.folders)  # type:ignore
-        total_size = own_files_size + own_folders_size
-        self.size = total_size
-        return total_size
+        stack = [(self, False)]
+        while stack:
+            folder, are_children_ready = stack.pop()
+            if folder.is_size_valid:
+                continue
+            if are_children_ready:
+                own_folders_size = sum(f.size for f in folder.folders)
+                folder.size = folder.files_size + own_folders_size
+                folder.is_size_valid = True
+            else:
+                stack.append((folder, True))
+                stack.extend((f, False) for f in folder.folders)
+        return self.size
+
+    def _invalidate_size(self):
+        folder = self
+        while folder is not None and folder.is_size_valid:
+            folder.is_size_valid = False
+            folder = folder.parent
 
     def add_file(self, file: File):
         self.files.append(file)
+        self.files_size += file.get_size()
+        self._invalidate_size()
 
     def add_folder(self, folder: BaseFolder):
         self.folders.append(folder)
+        self.folders_by_name.setdefault(folder.name, folder)
+        self._invalidate_size()
 
     def get_subfolder(self, name: str) -> Union[None, BaseFolder]:
-        result = None
-        for folder in self.folders:
-            if folder.name == name:
-                result = folder
-                break
-        return result
+        return self.folders_by_name.get(name)
 
     def get_root(self):
         current_dir = self
@@ -88,51 +108,151 @@ def build_folder_structure(path: Path) -> Folder:
     return root
 
 
-def find_sizes_bfs(root: Folder) -> List[BaseFolder]:
-    queue_ = [root]
-    visited = [root]
-    folders_with_sizes = []
-    while queue_:
-        current_folder = queue_.pop()
-        folders_with_sizes.append(
-            BaseFolder(current_folder.name, current_folder.get_size())
-        )
+def iter_folder_sizes(root: Folder) -> Iterator[Tuple[str, int]]:
+    root.get_size()
+    visited = {id(root)}
+    stack = [(root, "/", False)]
+    while stack:
+        folder, folder_path, are_children_done = stack.pop()
+        if are_children_done:
+            yield folder_path, folder.get_size()
+            continue
+        stack.append((folder, folder_path, True))
+        for child in folder.folders:
+            if id(child) not in visited:
+                visited.add(id(child))
+                stack.append((child, f"{folder_path.rstrip('/')}/{child.name}", False))
+
+
+@dataclass
+class FlatFolderTree:
+    names: List[str] = field(default_factory=lambda: ["/"])
+    parents: List[int] = field(default_factory=lambda: [-1])
+    sizes: List[int] = field(default_factory=lambda: [0])
+    subfolders: List[Dict[str, int]] = field(default_factory=lambda: [{}])
+    is_listed: List[bool] = field(default_factory=lambda: [False])
+    are_sizes_aggregated: bool = False
+
+    def get_or_add_subfolder(self, folder_id: int, name: str) -> int:
+        subfolder_id = self.subfolders[folder_id].get(name)
+        if subfolder_id is None:
+            subfolder_id = len(self.names)
+            self.names.append(name)
+            self.parents.append(folder_id)
+            self.sizes.append(0)
+            self.subfolders.append({})
+            self.is_listed.append(False)
+            self.subfolders[folder_id][name] = subfolder_id
+        return subfolder_id
+
+    def aggregate_sizes(self):
+        if self.are_sizes_aggregated:
+            return
+        for folder_id in range(len(self.sizes) - 1, 0, -1):
+            self.sizes[self.parents[folder_id]] += self.sizes[folder_id]
+        self.are_sizes_aggregated = True
+
+
+def parse_transcript(lines: Iterable[str]) -> FlatFolderTree:
+    tree = FlatFolderTree()
+    current_id = 0
+    is_listing = False
+    for line in lines:
+        if line.startswith("$ cd "):
+            is_listing = False
+            name = line[5:].rstrip()
+            if name == "/":
+                current_id = 0
+            elif name == "..":
+                current_id = max(tree.parents[current_id], 0)
+            else:
+                current_id = tree.get_or_add_subfolder(current_id, name)
+        elif line.startswith("$ ls"):
+            is_listing = not tree.is_listed[current_id]
+            tree.is_listed[current_id] = True
+        elif line.startswith("$"):
+            is_listing = False
+        elif not is_listing:
+            continue
+        elif line.startswith("dir "):
+            tree.get_or_add_subfolder(current_id, line[4:].rstrip())
+        elif line[:1].isdigit():
+            tree.sizes[current_id] += int(line[: line.index(" ")])
+    tree.aggregate_sizes()
+    return tree
+
+
+def build_flat_folder_tree(path: Path) -> FlatFolderTree:
+    with open(path, "r") as fin:
+        return parse_transcript(fin)
+
+
+@dataclass
+class FolderSizeIndex:
+    sizes: List[int]
+    prefix_sums: List[int]
+
+    @classmethod
+    def from_sizes(cls, sizes: Iterable[int]) -> "FolderSizeIndex":
+        sorted_sizes = sorted(sizes)
+        return cls(sorted_sizes, list(accumulate(sorted_sizes, initial=0)))
+
+    def get_total_size_up_to(self, limit: int) -> int:
+        return self.prefix_sums[bisect_right(self.sizes, limit)]
+
+    def get_smallest_at_least(self, need_to_free: int) -> Optional[int]:
+        i = bisect_left(self.sizes, need_to_free)
+        return self.sizes[i] if i < len(self.sizes) else None
 
-        for child in current_folder.folders:
-            if child not in visited:
-                visited.append(child)
-                queue_.append(child)
-    return folders_with_sizes
 
+def summarize_flat_folder_tree(tree: FlatFolderTree, limit: int) -> Tuple[int, int]:
+    need_to_free_space = REQUIRED_SPACE - (TOTAL_SPACE - tree.sizes[0])
+    index = FolderSizeIndex.from_sizes(tree.sizes)
+    total_size_smaller_than_limit = index.get_total_size_up_to(limit)
+    size_to_delete = index.get_smallest_at_least(need_to_free_space)
+    if size_to_delete is None:
+        size_to_delete = tree.sizes[0]  # delete root by default
+    return total_size_smaller_than_limit, size_to_delete
 
-def find_best_smallest_folder_to_delete(
-    folders_with_sizes: List[BaseFolder], need_to_free: int
-) -> BaseFolder:
-    result = folders_with_sizes[0]  # delete root by default
-    for folder in sorted(folders_with_sizes, key=lambda x: x.size):
-        if folder.size >= need_to_free:
-            result = folder
-            break
-    return result
+
+def get_need_to_free_space(root_folder: Folder) -> int:
+    current_free_space = TOTAL_SPACE - root_folder.get_size()
+    return REQUIRED_SPACE - current_free_space
+
+
+def summarize_folder_sizes(root_folder: Folder, limit: int) -> Tuple[int, int]:
+    need_to_free_space = get_need_to_free_space(root_folder)
+    total_size_smaller_than_limit = 0
+    size_to_delete = root_folder.get_size()
+    for _, size in iter_folder_sizes(root_folder):
+        if size <= limit:
+            total_size_smaller_than_limit += size
+        if need_to_free_space <= size < size_to_delete:
+            size_to_delete = size
+    return total_size_smaller_than_limit, size_to_delete
 
 
 def process_input(path: Path, limit: int) -> int:
     root_folder = build_folder_structure(path)
-    folders_with_sizes = find_sizes_bfs(root_folder)
-    folders_smaller_then_limit = [f for f in folders_with_sizes if f.size <= limit]
-    total_size_smaller_than_limit = sum([f.size for f in folders_smaller_then_limit])
-    return total_size_smaller_than_limit
+    folder_sizes = iter_folder_sizes(root_folder)
+    return sum(size for _, size in folder_sizes if size <= limit)
 
 
 def process_input_pt_2(path: Path) -> int:
     root_folder = build_folder_structure(path)
-    folders_with_sizes = find_sizes_bfs(root_folder)
-    current_free_space = TOTAL_SPACE - root_folder.size
-    need_to_free_space = REQUIRED_SPACE - current_free_space
-    folder_to_del = find_best_smallest_folder_to_delete(
-        folders_with_sizes, need_to_free_space
+    need_to_free_space = get_need_to_free_space(root_folder)
+    folder_sizes = iter_folder_sizes(root_folder)
+    return min(
+        (size for _, size in folder_sizes if size >= need_to_free_space),
+        default=root_folder.get_size(),
     )
-    return folder_to_del.size
+
+
+def process_input_both(path: Path, limit: int, flat: bool = False) -> Tuple[int, int]:
+    if flat:
+        return summarize_flat_folder_tree(build_flat_folder_tree(path), limit)
+    root_folder = build_folder_structure(path)
+    return summarize_folder_sizes(root_folder, limit)
 
 
 if __name__ == "__main__":
@@ -149,9 +269,35 @@ if __name__ == "__main__":
         default=100000,
         help="Max size of the dir to consider.",
     )
+    parser.add_argument(
+        "--flat",
+        action="store_true",
+        help="Parse the transcript into a flat array of folder sizes.",
+    )
+    parser.add_argument(
+        "--limits",
+        type=int,
+        nargs="+",
+        default=[],
+        help="Batch of max dir sizes to sum, answered from one size index.",
+    )
+    parser.add_argument(
+        "--need_to_free",
+        type=int,
+        nargs="+",
+        default=[],
+        help="Batch of sizes to free, answered from one size index.",
+    )
     args = parser.parse_args()
-    total_size = process_input(args.input, args.limit)
-    print(f"Total size of the directories {total_size}")
-
-    size_to_del = process_input_pt_2(args.input)
-    print(f"Size of the smallest folder to delete {size_to_del}")
+    if args.limits or args.need_to_free:
+        index = FolderSizeIndex.from_sizes(build_flat_folder_tree(args.input).sizes)
+        for limit in args.limits:
+            total_size = index.get_total_size_up_to(limit)
+            print(f"Total size of the directories up to {limit}: {total_size}")
+        for need_to_free in args.need_to_free:
+            size_to_del = index.get_smallest_at_least(need_to_free)
+            print(f"Smallest folder freeing {need_to_free}: {size_to_del}")
+    else:
+        total_size, size_to_del = process_input_both(args.input, args.limit, args.flat)
+        print(f"Total size of the directories {total_size}")
+        print(f"Size of the smallest folder to delete {size_to_del}")
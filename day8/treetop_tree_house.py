@@ -1,7 +1,13 @@
 import argparse
+import mmap
+import os
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
 
 
 @dataclass
@@ -93,6 +99,12 @@ class Grid:
                 break
         return trees
 
+    def get_height_rows(self) -> List[List[int]]:
+        return [
+            [t.height for t in self.trees_by_row_id[row_id]]
+            for row_id in sorted(self.trees_by_row_id)
+        ]
+
     def is_tree_hidden(self, tree: Tree) -> bool:
         hidden_from_left = any(
             [t.height >= tree.height for t in self._get_trees_to_the_left(tree)]
@@ -123,6 +135,165 @@ class Grid:
         return scientific_score
 
 
+ZERO_HEIGHT = ord("0")
+
+
+@dataclass
+class CompactGrid:
+    digits: Union[mmap.mmap, bytes]
+    num_rows: int
+    num_cols: int
+    row_stride: int
+
+    def __enter__(self) -> "CompactGrid":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self.digits, mmap.mmap):
+            self.digits.close()
+
+    @property
+    def trees(self) -> Iterator[Tree]:
+        for row_id in range(self.num_rows):
+            for col_id, digit in enumerate(self.get_row(row_id)):
+                yield Tree(row_id, col_id, digit - ZERO_HEIGHT)
+
+    def get_row(self, row_id: int) -> memoryview:
+        start = row_id * self.row_stride
+        return memoryview(self.digits)[start : start + self.num_cols]
+
+    def get_col(self, col_id: int) -> memoryview:
+        end = self.num_rows * self.row_stride
+        return memoryview(self.digits)[col_id : end : self.row_stride]
+
+    def get_height(self, row_id: int, col_id: int) -> int:
+        return self.digits[row_id * self.row_stride + col_id] - ZERO_HEIGHT
+
+    def get_height_rows(self) -> List[memoryview]:
+        return [self.get_row(row_id) for row_id in range(self.num_rows)]
+
+    def _get_lines_of_sight(self, tree: Tree) -> List[Sequence[int]]:
+        row = self.get_row(tree.row_id)
+        col = self.get_col(tree.col_id)
+        return [
+            row[tree.col_id - 1 :: -1] if tree.col_id else row[:0],
+            row[tree.col_id + 1 :],
+            col[tree.row_id - 1 :: -1] if tree.row_id else col[:0],
+            col[tree.row_id + 1 :],
+        ]
+
+    def is_tree_hidden(self, tree: Tree) -> bool:
+        digit = tree.height + ZERO_HEIGHT
+        return all(
+            max(line, default=-1) >= digit for line in self._get_lines_of_sight(tree)
+        )
+
+    def get_tree_scientific_score(self, tree: Tree) -> int:
+        digit = tree.height + ZERO_HEIGHT
+        scientific_score = 1
+        for line in self._get_lines_of_sight(tree):
+            score = 0
+            for other_digit in line:
+                score += 1
+                if other_digit >= digit:
+                    break
+            scientific_score *= score
+        return scientific_score
+
+
+def mark_visible_from_sides(row: Sequence[int], visible_row: List[bool]):
+    max_height = -1
+    for col_id in range(len(row)):
+        if row[col_id] > max_height:
+            visible_row[col_id] = True
+            max_height = row[col_id]
+    max_height = -1
+    for col_id in range(len(row) - 1, -1, -1):
+        if row[col_id] > max_height:
+            visible_row[col_id] = True
+            max_height = row[col_id]
+
+
+def mark_visible_from_above(
+    row: Sequence[int], visible_row: List[bool], max_heights: List[int]
+):
+    for col_id in range(len(row)):
+        if row[col_id] > max_heights[col_id]:
+            visible_row[col_id] = True
+            max_heights[col_id] = row[col_id]
+
+
+def get_visibility_map(rows: Sequence[Sequence[int]]) -> List[List[bool]]:
+    num_cols = len(rows[0]) if rows else 0
+    visible = [[False] * num_cols for _ in rows]
+    for row, visible_row in zip(rows, visible):
+        mark_visible_from_sides(row, visible_row)
+    for row_ids in (range(len(rows)), range(len(rows) - 1, -1, -1)):
+        max_heights = [-1] * num_cols
+        for row_id in row_ids:
+            mark_visible_from_above(rows[row_id], visible[row_id], max_heights)
+    return visible
+
+
+def count_visible_trees(rows: Sequence[Sequence[int]]) -> int:
+    return sum(sum(visible_row) for visible_row in get_visibility_map(rows))
+
+
+def get_distances_to_blocking_tree(line: Sequence[int]) -> List[int]:
+    distances = []
+    stack = []
+    for i, height in enumerate(line):
+        while stack and line[stack[-1]] < height:
+            stack.pop()
+        distances.append(i - stack[-1] if stack else i)
+        stack.append(i)
+    return distances
+
+
+def get_viewing_distances(line: Sequence[int]) -> Tuple[List[int], List[int]]:
+    towards_start = get_distances_to_blocking_tree(line)
+    towards_end = get_distances_to_blocking_tree(line[::-1])[::-1]
+    return towards_start, towards_end
+
+
+def get_scenic_scores(
+    rows: Sequence[Sequence[int]], workers: int = 1
+) -> List[List[int]]:
+    cols = list(zip(*rows))
+    if workers > 1:
+        chunksize = max(1, (len(rows) + len(cols)) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            row_distances = list(
+                executor.map(
+                    get_viewing_distances, map(bytes, rows), chunksize=chunksize
+                )
+            )
+            col_distances = list(
+                executor.map(
+                    get_viewing_distances, map(bytes, cols), chunksize=chunksize
+                )
+            )
+    else:
+        row_distances = [get_viewing_distances(row) for row in rows]
+        col_distances = [get_viewing_distances(col) for col in cols]
+    scores = []
+    for row_id, (left, right) in enumerate(row_distances):
+        scores.append(
+            [
+                left[col_id] * right[col_id] * top[row_id] * bottom[row_id]
+                for col_id, (top, bottom) in enumerate(col_distances)
+            ]
+        )
+    return scores
+
+
+def get_max_scenic_score(rows: Sequence[Sequence[int]], workers: int = 1) -> int:
+    return max(max(row) for row in get_scenic_scores(rows, workers))
+
+
 def load_grid(path: Path) -> Grid:
     grid = Grid()
     with open(path, "r") as fin:
@@ -132,13 +303,133 @@ def load_grid(path: Path) -> Grid:
     return grid
 
 
-def process_input(grid: Grid) -> int:
+def load_compact_grid(path: Path) -> CompactGrid:
+    with open(path, "rb") as fin:
+        digits = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+    num_cols = digits.find(b"\n")
+    if num_cols == -1:
+        num_cols = len(digits)
+    row_stride = num_cols + 1
+    num_rows = -(-len(digits) // row_stride)
+    return CompactGrid(digits, num_rows, num_cols, row_stride)
+
+
+def get_grid_shape(path: Path) -> Tuple[int, int, int]:
+    with open(path, "rb") as fin:
+        num_cols = len(fin.readline().rstrip(b"\n"))
+    row_stride = num_cols + 1
+    num_rows = -(-os.path.getsize(path) // row_stride)
+    return num_rows, num_cols, row_stride
+
+
+def iter_row_bands(
+    path: Path, tile_size: int, reverse: bool = False
+) -> Iterator[Tuple[int, List[bytes]]]:
+    num_rows, num_cols, row_stride = get_grid_shape(path)
+    band_starts = range(0, num_rows, tile_size)
+    with open(path, "rb") as fin:
+        for band_start in reversed(band_starts) if reverse else band_starts:
+            num_band_rows = min(tile_size, num_rows - band_start)
+            fin.seek(band_start * row_stride)
+            band = fin.read(num_band_rows * row_stride)
+            rows = [band[i : i + num_cols] for i in range(0, len(band), row_stride)]
+            yield band_start, rows
+
+
+def process_input_tiled(path: Path, tile_size: int) -> int:
+    _, num_cols, _ = get_grid_shape(path)
+    num_visible_trees = 0
+    with tempfile.TemporaryFile() as visible_from_below:
+        max_heights = [-1] * num_cols
+        for band_start, rows in iter_row_bands(path, tile_size, reverse=True):
+            band_visible = []
+            for row in reversed(rows):
+                visible_row = [False] * num_cols
+                mark_visible_from_above(row, visible_row, max_heights)
+                band_visible.append(bytes(visible_row))
+            visible_from_below.seek(band_start * num_cols)
+            visible_from_below.write(b"".join(reversed(band_visible)))
+
+        max_heights = [-1] * num_cols
+        for band_start, rows in iter_row_bands(path, tile_size):
+            visible_from_below.seek(band_start * num_cols)
+            band_visible = visible_from_below.read(len(rows) * num_cols)
+            for i, row in enumerate(rows):
+                visible_row = [
+                    bool(v) for v in band_visible[i * num_cols : (i + 1) * num_cols]
+                ]
+                mark_visible_from_sides(row, visible_row)
+                mark_visible_from_above(row, visible_row, max_heights)
+                num_visible_trees += sum(visible_row)
+    return num_visible_trees
+
+
+def get_distances_to_blocking_row(
+    row_id: int, row: Sequence[int], last_row_ids: List[List[int]], default: int
+) -> List[int]:
+    distances = []
+    for col_id, digit in enumerate(row):
+        height = digit - ZERO_HEIGHT
+        blocking_row_ids = last_row_ids[col_id]
+        distance = default
+        for blocking_row_id in blocking_row_ids[height:]:
+            if blocking_row_id >= 0:
+                distance = min(distance, abs(row_id - blocking_row_id))
+        distances.append(distance)
+        blocking_row_ids[height] = row_id
+    return distances
+
+
+def process_input_pt_2_tiled(path: Path, tile_size: int) -> int:
+    num_rows, num_cols, _ = get_grid_shape(path)
+    scientific_score = 0
+    with tempfile.TemporaryFile() as distances_below:
+        last_row_ids = [[-1] * 10 for _ in range(num_cols)]
+        for band_start, rows in iter_row_bands(path, tile_size, reverse=True):
+            band_rows_distances = []
+            for i in range(len(rows) - 1, -1, -1):
+                row_id = band_start + i
+                band_rows_distances.append(
+                    get_distances_to_blocking_row(
+                        row_id, rows[i], last_row_ids, num_rows - 1 - row_id
+                    )
+                )
+            band_distances = array("I")
+            for row_distances in reversed(band_rows_distances):
+                band_distances.extend(row_distances)
+            distances_below.seek(band_start * num_cols * band_distances.itemsize)
+            band_distances.tofile(distances_below)
+
+        last_row_ids = [[-1] * 10 for _ in range(num_cols)]
+        for band_start, rows in iter_row_bands(path, tile_size):
+            band_distances = array("I")
+            distances_below.seek(band_start * num_cols * band_distances.itemsize)
+            band_distances.fromfile(distances_below, len(rows) * num_cols)
+            for i, row in enumerate(rows):
+                row_id = band_start + i
+                top = get_distances_to_blocking_row(row_id, row, last_row_ids, row_id)
+                left, right = get_viewing_distances(row)
+                bottom = band_distances[i * num_cols : (i + 1) * num_cols]
+                for scores in zip(left, right, top, bottom):
+                    scientific_score = max(
+                        scientific_score, scores[0] * scores[1] * scores[2] * scores[3]
+                    )
+    return scientific_score
+
+
+def process_input(grid: Union[Grid, CompactGrid], use_sweep: bool = False) -> int:
+    if use_sweep:
+        return count_visible_trees(grid.get_height_rows())
     visible_trees = [t for t in grid.trees if not grid.is_tree_hidden(t)]
     num_visible_trees = len(visible_trees)
     return num_visible_trees
 
 
-def process_input_pt_2(grid: Grid) -> int:
+def process_input_pt_2(
+    grid: Union[Grid, CompactGrid], use_monotonic_stack: bool = False, workers: int = 1
+) -> int:
+    if use_monotonic_stack:
+        return get_max_scenic_score(grid.get_height_rows(), workers)
     scientific_scores = [grid.get_tree_scientific_score(t) for t in grid.trees]
     scientific_score = max(scientific_scores)
     return scientific_score
@@ -152,10 +443,46 @@ if __name__ == "__main__":
         default="day8/input/input.txt",
         help="Path to the input file.",
     )
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="Find visible trees with running max sweeps in four directions.",
+    )
+    parser.add_argument(
+        "--monotonic_stack",
+        action="store_true",
+        help="Find viewing distances with a monotonic stack per row and column.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used with --monotonic_stack.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Memory map the input instead of creating a Tree per cell.",
+    )
+    parser.add_argument(
+        "--tile_size",
+        type=int,
+        default=0,
+        help="Stream the grid from disk in bands of this many rows.",
+    )
     args = parser.parse_args()
-    grid = load_grid(args.input)
-    num_visible_trees = process_input(grid)
+    if args.tile_size:
+        num_visible_trees = process_input_tiled(args.input, args.tile_size)
+        highest_scientific_score = process_input_pt_2_tiled(args.input, args.tile_size)
+    else:
+        if args.compact:
+            grid_context = load_compact_grid(args.input)
+        else:
+            grid_context = nullcontext(load_grid(args.input))
+        with grid_context as grid:
+            num_visible_trees = process_input(grid, use_sweep=args.sweep)
+            highest_scientific_score = process_input_pt_2(
+                grid, use_monotonic_stack=args.monotonic_stack, workers=args.workers
+            )
     print(f"Total visible trees {num_visible_trees}")
-
-    highest_scientific_score = process_input_pt_2(grid)
     print(f"Highest scientific score {highest_scientific_score}")
@@ -1,8 +1,11 @@
 import argparse
-from dataclasses import dataclass
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
+from itertools import repeat
 from pathlib import Path
-from typing import List, Set, Tuple, Union
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 
 class Direction(str, Enum):
@@ -50,7 +53,7 @@ class Knot:
 @dataclass
 class TailKnot(Knot):
     previous_knot: Knot
-    position_diff: Position = Position(0, 0)
+    position_diff: Position = field(default_factory=lambda: Position(0, 0))
 
     def _calculate_position_diff(self):
         x_diff = self.previous_knot.position.x - self.position.x
@@ -112,6 +115,158 @@ class Rope:
             tail_knot.mark_current_as_visited()
 
 
+DIRECTION_DELTAS = {
+    Direction.RIGHT: (1, 0),
+    Direction.LEFT: (-1, 0),
+    Direction.UP: (0, 1),
+    Direction.DOWN: (0, -1),
+}
+
+
+def get_sign(value: int) -> int:
+    return (value > 0) - (value < 0)
+
+
+FOLLOW_MOVES = {
+    (x_diff, y_diff): (get_sign(x_diff), get_sign(y_diff))
+    for x_diff in range(-2, 3)
+    for y_diff in range(-2, 3)
+    if abs(x_diff) == 2 or abs(y_diff) == 2
+}
+
+BITMAP_TILE_SIZE = 64
+
+
+@dataclass
+class VisitedBitmap:
+    tiles: Dict[Tuple[int, int], bytearray] = field(default_factory=dict)
+    num_visited: int = 0
+
+    def add(self, cell: Tuple[int, int]):
+        tile_x, x = divmod(cell[0], BITMAP_TILE_SIZE)
+        tile_y, y = divmod(cell[1], BITMAP_TILE_SIZE)
+        tile = self.tiles.get((tile_x, tile_y))
+        if tile is None:
+            tile = bytearray(BITMAP_TILE_SIZE * BITMAP_TILE_SIZE // 8)
+            self.tiles[(tile_x, tile_y)] = tile
+        byte_id, bit_id = divmod(y * BITMAP_TILE_SIZE + x, 8)
+        if not tile[byte_id] >> bit_id & 1:
+            tile[byte_id] |= 1 << bit_id
+            self.num_visited += 1
+
+    def update(self, cells: Iterable[Tuple[int, int]]):
+        for cell in cells:
+            self.add(cell)
+
+    def __len__(self) -> int:
+        return self.num_visited
+
+
+@dataclass
+class FastRope:
+    knots_x: array
+    knots_y: array
+    visited: Dict[int, Union[Set[Tuple[int, int]], VisitedBitmap]]
+
+    @classmethod
+    def from_num_knots(
+        cls,
+        num_knots: int,
+        tracked_knots: Optional[Iterable[int]] = None,
+        use_bitmap: bool = False,
+    ) -> "FastRope":
+        if tracked_knots is None:
+            tracked_knots = [num_knots - 1]
+        visited = {}
+        for knot_id in tracked_knots:
+            visited[knot_id] = VisitedBitmap() if use_bitmap else set()
+            visited[knot_id].add((0, 0))
+        return cls(array("q", [0] * num_knots), array("q", [0] * num_knots), visited)
+
+    def _step(self, dx: int, dy: int):
+        knots_x, knots_y = self.knots_x, self.knots_y
+        knots_x[0] += dx
+        knots_y[0] += dy
+        last_moved = 0
+        for i in range(1, len(knots_x)):
+            move = FOLLOW_MOVES.get(
+                (knots_x[i - 1] - knots_x[i], knots_y[i - 1] - knots_y[i])
+            )
+            if move is None:
+                break
+            knots_x[i] += move[0]
+            knots_y[i] += move[1]
+            last_moved = i
+        for knot_id, visited in self.visited.items():
+            if knot_id <= last_moved:
+                visited.add((knots_x[knot_id], knots_y[knot_id]))
+
+    def _is_straight(self, dx: int, dy: int) -> bool:
+        knots_x, knots_y = self.knots_x, self.knots_y
+        return all(
+            knots_x[i - 1] - knots_x[i] == dx and knots_y[i - 1] - knots_y[i] == dy
+            for i in range(1, len(knots_x))
+        )
+
+    def move(self, direction: Union[str, Direction], num_steps: int):
+        dx, dy = DIRECTION_DELTAS[Direction(direction)]
+        while num_steps and not self._is_straight(dx, dy):
+            self._step(dx, dy)
+            num_steps -= 1
+        if not num_steps:
+            return
+        for knot_id, visited in self.visited.items():
+            x, y = self.knots_x[knot_id], self.knots_y[knot_id]
+            xs = range(x + dx, x + dx * (num_steps + 1), dx) if dx else repeat(x)
+            ys = range(y + dy, y + dy * (num_steps + 1), dy) if dy else repeat(y)
+            visited.update(zip(xs, ys))
+        self.knots_x = array("q", [x + dx * num_steps for x in self.knots_x])
+        self.knots_y = array("q", [y + dy * num_steps for y in self.knots_y])
+
+
+def process_input_fast(path: Path, num_knots=2, use_bitmap: bool = False) -> int:
+    rope = FastRope.from_num_knots(num_knots, use_bitmap=use_bitmap)
+    with open(path, "r") as fin:
+        for line in fin:
+            direction, num_steps = line.split()
+            rope.move(direction, int(num_steps))
+    return len(rope.visited[num_knots - 1])
+
+
+def process_input_many(
+    path: Path, knot_counts: Iterable[int], use_bitmap: bool = False
+) -> Dict[int, int]:
+    knot_counts = sorted(set(knot_counts))
+    rope = FastRope.from_num_knots(
+        knot_counts[-1],
+        tracked_knots=[num_knots - 1 for num_knots in knot_counts],
+        use_bitmap=use_bitmap,
+    )
+    with open(path, "r") as fin:
+        for line in fin:
+            direction, num_steps = line.split()
+            rope.move(direction, int(num_steps))
+    return {num_knots: len(rope.visited[num_knots - 1]) for num_knots in knot_counts}
+
+
+def process_inputs_many(
+    paths: Iterable[Path],
+    knot_counts: Iterable[int],
+    use_bitmap: bool = False,
+    workers: int = 1,
+) -> Dict[Path, Dict[int, int]]:
+    paths = list(paths)
+    knot_counts = list(knot_counts)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            process_input_many,
+            paths,
+            repeat(knot_counts),
+            repeat(use_bitmap),
+        )
+        return dict(zip(paths, results))
+
+
 def process_input(path: Path, num_knots=2) -> int:
     head = Knot(position=Position(0, 0), visited=set())
     previous_knot = head
@@ -140,9 +295,59 @@ if __name__ == "__main__":
         default="day9/input/input.txt",
         help="Path to the input file.",
     )
+    parser.add_argument(
+        "--per_step",
+        action="store_true",
+        help="Simulate every unit step with the Rope dataclasses, once per rope.",
+    )
+    parser.add_argument(
+        "--bitmap",
+        action="store_true",
+        help="Track visited cells in a tiled bitmap.",
+    )
+    parser.add_argument(
+        "--inputs",
+        type=Path,
+        nargs="+",
+        help="Batch of input files simulated in a process pool.",
+    )
+    parser.add_argument(
+        "--knot_counts",
+        type=int,
+        nargs="+",
+        default=[2, 10],
+        help="Rope lengths to report for each of --inputs.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used for --inputs.",
+    )
     args = parser.parse_args()
-    num_visited_by_tail = process_input(args.input)
-    print(f"Total positions visited by tail {num_visited_by_tail}")
+    if args.inputs:
+        results = process_inputs_many(
+            args.inputs, args.knot_counts, args.bitmap, args.workers
+        )
+        for path, num_visited_by_knot_count in results.items():
+            for num_knots, num_visited_by_tail in num_visited_by_knot_count.items():
+                print(
+                    f"{path}: positions visited by tail of {num_knots} knots "
+                    f"{num_visited_by_tail}"
+                )
+    else:
+        if args.per_step:
+            num_visited_by_knot_count = {
+                num_knots: process_input(args.input, num_knots) for num_knots in (2, 10)
+            }
+        else:
+            num_visited_by_knot_count = process_input_many(
+                args.input, [2, 10], args.bitmap
+            )
+        num_visited_by_tail = num_visited_by_knot_count[2]
+        print(f"Total positions visited by tail {num_visited_by_tail}")
 
-    num_visited_by_tail = process_input(Path(args.input), 10)
-    print(f"Total positions visited by tail of the longer rope {num_visited_by_tail}")
+        num_visited_by_tail = num_visited_by_knot_count[10]
+        print(
+            f"Total positions visited by tail of the longer rope {num_visited_by_tail}"
+        )